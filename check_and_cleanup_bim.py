@@ -4,9 +4,44 @@ Helper script to check what was created and clean up if needed.
 Run this in FreeCAD Python console to diagnose the current state.
 """
 
+import functools
+from collections import defaultdict
+from itertools import islice
+
 import FreeCAD
 import Arch
 
+# Object category for each Arch TypeId, used to bucket document objects
+CATEGORY = {
+    "Arch::Structure": "structures",
+    "Arch::Floor": "floors",
+    "Arch::BuildingPart": "floors",
+    "Arch::Building": "buildings",
+    "Arch::Site": "sites",
+}
+
+@functools.lru_cache(maxsize=None)
+def _classify(type_id):
+    """Return the category of a TypeId, matched once per distinct TypeId."""
+    if type_id in CATEGORY:
+        return CATEGORY[type_id]
+    if "Structure" in type_id:
+        return "structures"
+    elif "Floor" in type_id or "BuildingPart" in type_id:
+        return "floors"
+    elif "Building" in type_id:
+        return "buildings"
+    elif "Site" in type_id:
+        return "sites"
+    return "others"
+
+def _get_doc(name="House_Frame_BIM"):
+    """Return the BIM document; raises if it is not open."""
+    # Not cached: the document can be closed or recreated outside these
+    # helpers (from the GUI, or by create_bim_model.py), and getDocument
+    # is only a dictionary lookup
+    return FreeCAD.getDocument(name)
+
 def check_bim_model_status():
     """Check what objects were created and their status."""
 
@@ -16,9 +51,9 @@ def check_bim_model_status():
 
     # Check if document exists
     try:
-        doc = FreeCAD.getDocument("House_Frame_BIM")
+        doc = _get_doc()
         print(f"\n✓ Document 'House_Frame_BIM' found")
-    except:
+    except Exception:
         print(f"\n✗ Document 'House_Frame_BIM' not found")
         print("\nAvailable documents:")
         for doc in FreeCAD.listDocuments():
@@ -35,19 +70,16 @@ def check_bim_model_status():
     buildings = []
     sites = []
     others = []
+    buckets = {
+        "structures": structures,
+        "floors": floors,
+        "buildings": buildings,
+        "sites": sites,
+        "others": others,
+    }
 
     for obj in doc.Objects:
-        obj_type = obj.TypeId
-        if "Structure" in obj_type:
-            structures.append(obj)
-        elif "Floor" in obj_type or "BuildingPart" in obj_type:
-            floors.append(obj)
-        elif "Building" in obj_type:
-            buildings.append(obj)
-        elif "Site" in obj_type:
-            sites.append(obj)
-        else:
-            others.append(obj)
+        buckets[_classify(obj.TypeId)].append(obj)
 
     print(f"   Structures (Arch::Structure): {len(structures)}")
     print(f"   Floors (Arch::Floor): {len(floors)}")
@@ -59,16 +91,13 @@ def check_bim_model_status():
     # Show structures by IFC type
     if structures:
         print(f"\n🏗️  Structures by IFC Type:")
-        ifc_types = {}
+        ifc_types = defaultdict(list)
         for s in structures:
-            ifc_type = getattr(s, 'IfcType', 'Unknown')
-            if ifc_type not in ifc_types:
-                ifc_types[ifc_type] = []
-            ifc_types[ifc_type].append(s.Label)
+            ifc_types[getattr(s, 'IfcType', 'Unknown')].append(s.Label)
 
         for ifc_type, labels in ifc_types.items():
             print(f"   {ifc_type}: {len(labels)} items")
-            for label in labels[:5]:  # Show first 5
+            for label in islice(labels, 5):  # Show first 5
                 print(f"      - {label}")
             if len(labels) > 5:
                 print(f"      ... and {len(labels) - 5} more")
@@ -79,36 +108,44 @@ def check_bim_model_status():
         if sites:
             for site in sites:
                 print(f"   Site: {site.Label}")
-                if hasattr(site, 'Group'):
-                    for building in site.Group:
-                        print(f"      └─ Building: {building.Label}")
-                        if hasattr(building, 'Group'):
-                            for floor in building.Group:
-                                print(f"         └─ Floor: {floor.Label}")
-                                if hasattr(floor, 'Group'):
-                                    print(f"            └─ Contains {len(floor.Group)} structures")
+                for building in getattr(site, 'Group', None) or ():
+                    print(f"      └─ Building: {building.Label}")
+                    for floor in getattr(building, 'Group', None) or ():
+                        print(f"         └─ Floor: {floor.Label}")
+                        contents = getattr(floor, 'Group', None)
+                        if contents is not None:
+                            print(f"            └─ Contains {len(contents)} structures")
         elif buildings:
             for building in buildings:
                 print(f"   Building: {building.Label}")
-                if hasattr(building, 'Group'):
-                    for floor in building.Group:
-                        print(f"      └─ Floor: {floor.Label}")
-                        if hasattr(floor, 'Group'):
-                            print(f"         └─ Contains {len(floor.Group)} structures")
+                for floor in getattr(building, 'Group', None) or ():
+                    print(f"      └─ Floor: {floor.Label}")
+                    contents = getattr(floor, 'Group', None)
+                    if contents is not None:
+                        print(f"         └─ Contains {len(contents)} structures")
         elif floors:
             for floor in floors:
                 print(f"   Floor: {floor.Label}")
-                if hasattr(floor, 'Group'):
-                    print(f"      └─ Contains {len(floor.Group)} structures")
+                contents = getattr(floor, 'Group', None)
+                if contents is not None:
+                    print(f"      └─ Contains {len(contents)} structures")
 
     print(f"\n" + "=" * 70)
 
-    # Determine if model is complete
-    expected_structures = 39  # 3 footings + 11 columns/posts + 3 beams + 23 rafters (actually 40 as per error)
-
-    if len(structures) >= expected_structures:
+    # Determine if model is complete. The rafters are two Draft arrays of one
+    # prototype per side; the arrays are not Arch objects, so they are
+    # counted separately, which also keeps a partial model from the old
+    # one-structure-per-rafter script from passing on structures alone.
+    expected_structures = 19  # 3 footings + 11 columns/posts + 3 beams + 2 rafter prototypes
+    expected_rafter_arrays = 2  # Arrayed into 23 rafters
+    rafter_arrays = [
+        obj for obj in others
+        if getattr(getattr(obj, 'Proxy', None), 'Type', None) == "Array"
+    ]
+
+    if len(structures) >= expected_structures and len(rafter_arrays) >= expected_rafter_arrays:
         print("✓ Model appears complete!")
-        print(f"  All {len(structures)} structural elements created")
+        print(f"  All {len(structures)} structural elements and {len(rafter_arrays)} rafter arrays created")
         if buildings:
             print("  ✓ Building hierarchy created")
         else:
@@ -123,6 +160,7 @@ def check_bim_model_status():
     else:
         print(f"⚠ Model is incomplete")
         print(f"  Expected ~{expected_structures} structures, found {len(structures)}")
+        print(f"  Expected {expected_rafter_arrays} rafter arrays, found {len(rafter_arrays)}")
         print("\n💡 Next steps:")
         print("  1. Close this document: File → Close")
         print("  2. Run the fixed create_bim_model.py script")
@@ -146,7 +184,11 @@ def cleanup_bim_document():
     print("=" * 70)
 
     try:
-        doc = FreeCAD.getDocument("House_Frame_BIM")
+        doc = _get_doc()
+    except Exception:
+        print("\n✗ Document 'House_Frame_BIM' not found")
+        print("   Nothing to clean up")
+    else:
         print(f"\n✓ Found document 'House_Frame_BIM'")
         print(f"   Contains {len(doc.Objects)} objects")
 
@@ -159,10 +201,6 @@ def cleanup_bim_document():
         else:
             print("❌ Cleanup cancelled")
 
-    except:
-        print("\n✗ Document 'House_Frame_BIM' not found")
-        print("   Nothing to clean up")
-
     print("=" * 70 + "\n")
 
 def fix_existing_model():
@@ -173,14 +211,24 @@ def fix_existing_model():
     print("=" * 70)
 
     try:
-        doc = FreeCAD.getDocument("House_Frame_BIM")
+        doc = _get_doc()
         print(f"\n✓ Found document 'House_Frame_BIM'")
-    except:
+    except Exception:
         print(f"\n✗ Document 'House_Frame_BIM' not found")
         return
 
+    # Categorize objects in a single pass
+    floors = []
+    buildings = []
+    sites = []
+    buckets = {"floors": floors, "buildings": buildings, "sites": sites}
+
+    for obj in doc.Objects:
+        bucket = buckets.get(_classify(obj.TypeId))
+        if bucket is not None:
+            bucket.append(obj)
+
     # Find the Floor object
-    floors = [obj for obj in doc.Objects if "Floor" in obj.TypeId or "BuildingPart" in obj.TypeId]
 
     if not floors:
         print("✗ No Floor object found - model may be too incomplete to fix")
@@ -191,8 +239,6 @@ def fix_existing_model():
     print(f"✓ Found Floor: {floor.Label}")
 
     # Check if Building already exists
-    buildings = [obj for obj in doc.Objects if "Building" in obj.TypeId]
-
     if buildings:
         print(f"✓ Building already exists: {buildings[0].Label}")
         building = buildings[0]
@@ -204,8 +250,6 @@ def fix_existing_model():
         print(f"✓ Created Building: {building.Label}")
 
     # Check if Site already exists
-    sites = [obj for obj in doc.Objects if "Site" in obj.TypeId]
-
     if sites:
         print(f"✓ Site already exists: {sites[0].Label}")
         site = sites[0]
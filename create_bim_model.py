@@ -17,17 +17,20 @@ Key improvements over basic modeling:
 - Professional BIM metadata
 
 Requirements: FreeCAD 0.19 or later with Arch and IFC support
+
+Running headless (freecadcmd create_bim_model.py) is fastest, since no view
+providers are attached to the created objects.
 """
 
 import os
 import sys
+from itertools import chain
 
 # Try to import FreeCAD
 try:
     import FreeCAD
     import Arch
     import Draft
-    import Part
 except ImportError as e:
     print(f"Error: FreeCAD modules not found. Please run this script within FreeCAD.")
     print(f"Details: {e}")
@@ -71,185 +74,218 @@ def create_bim_house_frame():
     # Set to Building US unit system (index 5)
     doc.UnitSystem = 5
 
-    print("\n[1/6] Creating foundation footings...")
-
-    # Foundation footings - using Arch Structure with "Slab" role
-    # Dimensions: 609.6mm x 609.6mm x 304.8mm (2ft x 2ft x 1ft)
-    footing_positions = [
-        ("Footing_1", FreeCAD.Vector(4267.2, -609.6, -914.4)),
-        ("Footing_2", FreeCAD.Vector(4267.2, 9448.8, -914.4)),
-        ("Footing_3", FreeCAD.Vector(4267.2, 4419.6, -914.4))
-    ]
-
-    footings = []
-    for name, pos in footing_positions:
-        # Create a box profile for the footing
-        footing_box = Part.makeBox(609.6, 609.6, 304.8)
-        footing_shape = doc.addObject("Part::Feature", name + "_Shape")
-        footing_shape.Shape = footing_box
-        footing_shape.ViewObject.Visibility = False
-
-        # Create Arch Structure from the shape
-        structure = Arch.makeStructure(footing_shape)
-        structure.Label = name.replace("_", " ")
-        structure.IfcType = "Footing"  # IFC role
-        structure.Placement.Base = pos
-
-        footings.append(structure)
-        doc.removeObject(footing_shape.Name)  # Remove helper shape
-        print(f"  ✓ Created {structure.Label} at {pos}")
-
-    print(f"\n[2/6] Creating vertical columns and posts...")
-
-    # Center columns - 6x6 inch timber (152.4mm x 152.4mm), height 3048mm (10ft)
-    column_positions = [
-        ("Column_Center_1", FreeCAD.Vector(4191.0, -609.6, -609.6)),
-        ("Column_Center_2", FreeCAD.Vector(4191.0, 9448.8, -609.6)),
-        ("Column_Center_3", FreeCAD.Vector(4191.0, 4419.6, -609.6))
-    ]
-
-    columns = []
-    for name, pos in column_positions:
-        # Use REC preset for rectangular column
-        structure = Arch.makeStructure(length=152.4, width=152.4, height=3048.0)
-        structure.Label = name.replace("_", " ")
-        structure.IfcType = "Column"  # IFC role
-        structure.Placement.Base = pos
-        columns.append(structure)
-        print(f"  ✓ Created {structure.Label}")
-
-    # Posts - 4x4 inch timber (101.6mm x 101.6mm), height 2438.4mm (8ft)
-    post_positions = [
-        ("Post_L_1", FreeCAD.Vector(1524.0, -558.8, -609.6)),
-        ("Post_L_2", FreeCAD.Vector(1524.0, 2514.6, -609.6)),
-        ("Post_L_3", FreeCAD.Vector(1524.0, 6324.6, -609.6)),
-        ("Post_L_4", FreeCAD.Vector(1524.0, 9397.8, -609.6)),
-        ("Post_R_1", FreeCAD.Vector(6858.0, -558.8, -609.6)),
-        ("Post_R_2", FreeCAD.Vector(6858.0, 2514.6, -609.6)),
-        ("Post_R_3", FreeCAD.Vector(6858.0, 6324.6, -609.6)),
-        ("Post_R_4", FreeCAD.Vector(6858.0, 9397.8, -609.6))
-    ]
-
-    posts = []
-    for name, pos in post_positions:
-        structure = Arch.makeStructure(length=101.6, width=101.6, height=2438.4)
-        structure.Label = name.replace("_", " ")
-        structure.IfcType = "Column"  # Posts are also columns in IFC
-        structure.Placement.Base = pos
-        posts.append(structure)
-        print(f"  ✓ Created {structure.Label}")
-
-    print(f"\n[3/6] Creating horizontal beams...")
-
-    # Horizontal beams - 4x8 inch timber (101.6mm x 203.2mm)
-    beams = []
-
-    # Ridge beam (peak) - runs along Y axis, length ~10m
-    ridge_beam = Arch.makeStructure(length=101.6, width=203.2, height=10058.4)
-    ridge_beam.Label = "Ridge Beam (Peak)"
-    ridge_beam.IfcType = "Beam"
-    ridge_beam.Placement = FreeCAD.Placement(
-        FreeCAD.Vector(4191.0, -609.6, 2438.4),
-        FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), 90)  # Rotate to lie along Y
-    )
-    beams.append(ridge_beam)
-    print(f"  ✓ Created {ridge_beam.Label}")
-
-    # Left horizontal beam
-    h_beam_left = Arch.makeStructure(length=101.6, width=203.2, height=10058.4)
-    h_beam_left.Label = "Horizontal Beam (Left)"
-    h_beam_left.IfcType = "Beam"
-    h_beam_left.Placement = FreeCAD.Placement(
-        FreeCAD.Vector(1524.0, -609.6, 1828.8),
-        FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), 90)
-    )
-    beams.append(h_beam_left)
-    print(f"  ✓ Created {h_beam_left.Label}")
-
-    # Right horizontal beam
-    h_beam_right = Arch.makeStructure(length=101.6, width=203.2, height=10058.4)
-    h_beam_right.Label = "Horizontal Beam (Right)"
-    h_beam_right.IfcType = "Beam"
-    h_beam_right.Placement = FreeCAD.Placement(
-        FreeCAD.Vector(6858.0, -609.6, 1828.8),
-        FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), 90)
-    )
-    beams.append(h_beam_right)
-    print(f"  ✓ Created {h_beam_right.Label}")
-
-    print(f"\n[4/6] Creating roof rafter system...")
-
-    # Rafters - 2x6 inch timber (38.1mm x 139.7mm), angled for roof
-    # Length approximately 3m, angle ~30 degrees
-    rafters = []
-
-    # Left rafters (12 total)
-    left_rafter_y_positions = [
-        -558.8, 279.4, 1117.6, 1955.8, 2794.0, 3632.2,
-        4470.4, 5308.6, 6146.8, 6985.0, 7823.2, 8661.4
-    ]
-
-    for i, y_pos in enumerate(left_rafter_y_positions, 1):
-        rafter = Arch.makeStructure(length=38.1, width=139.7, height=3000.0)
-        rafter.Label = f"Left Rafter {i}"
-        rafter.IfcType = "Beam"  # Rafters are beams in IFC
+    # Freeze recomputes while the structural elements are being created so the
+    # dependency graph is only walked once, in step [6/6]
+    doc.RecomputesFrozen = True
+
+    try:
+        print("\n[1/6] Creating foundation footings...")
+
+        # Foundation footings - using Arch Structure with "Slab" role
+        # Dimensions: 609.6mm x 609.6mm x 304.8mm (2ft x 2ft x 1ft)
+        footing_positions = [
+            ("Footing_1", FreeCAD.Vector(4267.2, -609.6, -914.4)),
+            ("Footing_2", FreeCAD.Vector(4267.2, 9448.8, -914.4)),
+            ("Footing_3", FreeCAD.Vector(4267.2, 4419.6, -914.4))
+        ]
+
+        # With no base object and Length > Height, Arch builds the box as a
+        # horizontal extrusion centred on its Y and Z axes; shift it back so the
+        # footing keeps the corner-at-position footprint of the old Part box
+        footing_offset = FreeCAD.Vector(0, 304.8, 152.4)
+
+        footings = []
+        for name, pos in footing_positions:
+            # Parametric box structure, no helper Part shape needed
+            structure = Arch.makeStructure(length=609.6, width=609.6, height=304.8)
+            structure.Label = name.replace("_", " ")
+            structure.Placement.Base = pos + footing_offset
+            footings.append(structure)
+
+        print(f"  ✓ Created {len(footings)} footings")
+
+        print(f"\n[2/6] Creating vertical columns and posts...")
+
+        # Center columns - 6x6 inch timber (152.4mm x 152.4mm), height 3048mm (10ft)
+        column_positions = [
+            ("Column_Center_1", FreeCAD.Vector(4191.0, -609.6, -609.6)),
+            ("Column_Center_2", FreeCAD.Vector(4191.0, 9448.8, -609.6)),
+            ("Column_Center_3", FreeCAD.Vector(4191.0, 4419.6, -609.6))
+        ]
+
+        columns = []
+        for name, pos in column_positions:
+            # Use REC preset for rectangular column
+            structure = Arch.makeStructure(length=152.4, width=152.4, height=3048.0)
+            structure.Label = name.replace("_", " ")
+            structure.Placement.Base = pos
+            columns.append(structure)
+
+        print(f"  ✓ Created {len(columns)} center columns")
+
+        # Posts - 4x4 inch timber (101.6mm x 101.6mm), height 2438.4mm (8ft)
+        post_positions = [
+            ("Post_L_1", FreeCAD.Vector(1524.0, -558.8, -609.6)),
+            ("Post_L_2", FreeCAD.Vector(1524.0, 2514.6, -609.6)),
+            ("Post_L_3", FreeCAD.Vector(1524.0, 6324.6, -609.6)),
+            ("Post_L_4", FreeCAD.Vector(1524.0, 9397.8, -609.6)),
+            ("Post_R_1", FreeCAD.Vector(6858.0, -558.8, -609.6)),
+            ("Post_R_2", FreeCAD.Vector(6858.0, 2514.6, -609.6)),
+            ("Post_R_3", FreeCAD.Vector(6858.0, 6324.6, -609.6)),
+            ("Post_R_4", FreeCAD.Vector(6858.0, 9397.8, -609.6))
+        ]
+
+        posts = []
+        for name, pos in post_positions:
+            structure = Arch.makeStructure(length=101.6, width=101.6, height=2438.4)
+            structure.Label = name.replace("_", " ")
+            structure.Placement.Base = pos
+            posts.append(structure)
+
+        print(f"  ✓ Created {len(posts)} posts")
+
+        print(f"\n[3/6] Creating horizontal beams...")
+
+        # Horizontal beams - 4x8 inch timber (101.6mm x 203.2mm)
+        beams = []
+        along_y = FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), 90)  # Rotate to lie along Y
+
+        # Ridge beam (peak) - runs along Y axis, length ~10m
+        ridge_beam = Arch.makeStructure(length=101.6, width=203.2, height=10058.4)
+        ridge_beam.Label = "Ridge Beam (Peak)"
+        ridge_beam.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(4191.0, -609.6, 2438.4),
+            along_y
+        )
+        beams.append(ridge_beam)
+        print(f"  ✓ Created {ridge_beam.Label}")
+
+        # Left horizontal beam
+        h_beam_left = Arch.makeStructure(length=101.6, width=203.2, height=10058.4)
+        h_beam_left.Label = "Horizontal Beam (Left)"
+        h_beam_left.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(1524.0, -609.6, 1828.8),
+            along_y
+        )
+        beams.append(h_beam_left)
+        print(f"  ✓ Created {h_beam_left.Label}")
+
+        # Right horizontal beam
+        h_beam_right = Arch.makeStructure(length=101.6, width=203.2, height=10058.4)
+        h_beam_right.Label = "Horizontal Beam (Right)"
+        h_beam_right.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(6858.0, -609.6, 1828.8),
+            along_y
+        )
+        beams.append(h_beam_right)
+        print(f"  ✓ Created {h_beam_right.Label}")
+
+        print(f"\n[4/6] Creating roof rafter system...")
+
+        # Rafters - 2x6 inch timber (38.1mm x 139.7mm), angled for roof
+        # Length approximately 3m, angle ~30 degrees
+        # Each side is one prototype rafter repeated along Y by a Draft array
+        # (838.2mm on center), so the BRep is built once instead of per rafter
+        rafters = []
+        rafter_y_start = -558.8  # Both sides start at the same Y
+        rafter_spacing = FreeCAD.Vector(0, 838.2, 0)  # 33 inches on center
+        left_rafter_count = 12
+        right_rafter_count = 11
+        no_offset = FreeCAD.Vector(0, 0, 0)
+        left_pitch = FreeCAD.Rotation(FreeCAD.Vector(0, 1, 0), -30)  # 30 degree roof pitch
+        right_pitch = FreeCAD.Rotation(FreeCAD.Vector(0, 1, 0), 30)  # Opposite angle
+
+        # Left rafters
+        left_rafter = Arch.makeStructure(length=38.1, width=139.7, height=3000.0)
+        left_rafter.Label = "Left Rafter"
         # Position and rotate for roof angle
-        rafter.Placement = FreeCAD.Placement(
-            FreeCAD.Vector(1524.0, y_pos, 1828.8),
-            FreeCAD.Rotation(FreeCAD.Vector(0, 1, 0), -30)  # 30 degree roof pitch
+        left_rafter.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(1524.0, rafter_y_start, 1828.8),
+            left_pitch
         )
-        rafters.append(rafter)
-
-    print(f"  ✓ Created {len(left_rafter_y_positions)} left rafters")
-
-    # Right rafters (11 total, numbered 0-10)
-    right_rafter_y_positions = [
-        -558.8, 279.4, 1117.6, 1955.8, 2794.0, 3632.2,
-        4470.4, 5308.6, 6146.8, 6985.0, 7823.2
-    ]
-
-    for i, y_pos in enumerate(right_rafter_y_positions):
-        rafter = Arch.makeStructure(length=38.1, width=139.7, height=3000.0)
-        rafter.Label = f"Right Rafter {i}"
-        rafter.IfcType = "Beam"
-        rafter.Placement = FreeCAD.Placement(
-            FreeCAD.Vector(6858.0, y_pos, 1828.8),
-            FreeCAD.Rotation(FreeCAD.Vector(0, 1, 0), 30)  # Opposite angle
+        left_rafters = Draft.make_ortho_array(
+            left_rafter,
+            v_x=no_offset, v_y=rafter_spacing,
+            n_x=1, n_y=left_rafter_count, n_z=1
         )
-        rafters.append(rafter)
-
-    print(f"  ✓ Created {len(right_rafter_y_positions)} right rafters")
-
-    print(f"\n[5/6] Organizing into BIM hierarchy...")
+        left_rafters.Label = "Left Rafters"
+        rafters.append(left_rafters)
 
-    # Collect all structural elements
-    all_structures = footings + columns + posts + beams + rafters
+        print(f"  ✓ Created {left_rafter_count} left rafters")
 
-    # Create Floor to contain all structural elements
-    floor = Arch.makeFloor(all_structures)
-    floor.Label = "Ground Floor Structure"
-    floor.Description = "Timber frame structural system including foundation, columns, beams, and roof"
-    print(f"  ✓ Created Floor containing {len(all_structures)} structural elements")
-
-    # Create Building to contain the floor
-    building = Arch.makeBuilding([floor])
-    building.Label = "Residential House"
-    building.Description = "Single-story residential timber frame house"
-    # Note: BuildingType is not a standard property in FreeCAD Arch::Building
-    # The building type is implicit in the IFC export based on the structure
-    print(f"  ✓ Created Building containing Floor")
-
-    # Create Site (optional but recommended for IFC)
-    site = Arch.makeSite([building])
-    site.Label = "Construction Site"
-    site.Terrain = None
-    print(f"  ✓ Created Site containing Building")
-
-    print(f"\n[6/6] Finalizing BIM model...")
-
-    # Recompute document
+        # Right rafters
+        right_rafter = Arch.makeStructure(length=38.1, width=139.7, height=3000.0)
+        right_rafter.Label = "Right Rafter"
+        right_rafter.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(6858.0, rafter_y_start, 1828.8),
+            right_pitch
+        )
+        right_rafters = Draft.make_ortho_array(
+            right_rafter,
+            v_x=no_offset, v_y=rafter_spacing,
+            n_x=1, n_y=right_rafter_count, n_z=1
+        )
+        right_rafters.Label = "Right Rafters"
+        rafters.append(right_rafters)
+
+        print(f"  ✓ Created {right_rafter_count} right rafters")
+
+        rafter_count = left_rafter_count + right_rafter_count
+
+        # Assign IFC roles per element group
+        ifc_roles = {
+            "Footing": footings,
+            "Column": columns + posts,  # Posts are also columns in IFC
+            "Beam": beams + [left_rafter, right_rafter],  # Rafters are beams in IFC
+        }
+        for ifc_type, structures in ifc_roles.items():
+            for structure in structures:
+                structure.IfcType = ifc_type
+
+        print(f"\n[5/6] Organizing into BIM hierarchy...")
+
+        # Collect all structural elements
+        all_structures = list(chain(footings, columns, posts, beams, rafters))
+
+        # Create Floor to contain all structural elements
+        floor = Arch.makeFloor(all_structures)
+        floor.Label = "Ground Floor Structure"
+        floor.Description = "Timber frame structural system including foundation, columns, beams, and roof"
+        print(f"  ✓ Created Floor containing {len(all_structures)} structural elements")
+
+        # Create Building to contain the floor
+        building = Arch.makeBuilding([floor])
+        building.Label = "Residential House"
+        building.Description = "Single-story residential timber frame house"
+        # Note: BuildingType is not a standard property in FreeCAD Arch::Building
+        # The building type is implicit in the IFC export based on the structure
+        print(f"  ✓ Created Building containing Floor")
+
+        # Create Site (optional but recommended for IFC)
+        site = Arch.makeSite([building])
+        site.Label = "Construction Site"
+        site.Terrain = None
+        print(f"  ✓ Created Site containing Building")
+
+        print(f"\n[6/6] Finalizing BIM model...")
+
+        # Keep the structures hidden while the document recomputes so the 3D view
+        # is tessellated once at the end rather than per structure
+        if FreeCAD.GuiUp:
+            for structure in all_structures:
+                structure.ViewObject.Visibility = False
+    finally:
+        # Unfreeze even if a step fails, so the open document is not left
+        # with recomputes frozen
+        doc.RecomputesFrozen = False
+
+    # Recompute the whole document in a single pass
     doc.recompute()
 
+    if FreeCAD.GuiUp:
+        for structure in all_structures:
+            structure.ViewObject.Visibility = True
+
     # Add project metadata to document
     doc.Meta = {
         "Project": "Residential House Frame",
@@ -268,7 +304,7 @@ def create_bim_house_frame():
     print(f"  • Foundation: {len(footings)} concrete footings")
     print(f"  • Vertical Structure: {len(columns)} columns + {len(posts)} posts")
     print(f"  • Horizontal Beams: {len(beams)} beams")
-    print(f"  • Roof System: {len(rafters)} rafters")
+    print(f"  • Roof System: {rafter_count} rafters in {len(rafters)} arrays")
     print(f"  • Total Elements: {len(all_structures)} structural components")
     print(f"\nHierarchy:")
     print(f"  Site → Building → Floor → {len(all_structures)} Structures")
@@ -277,9 +313,16 @@ def create_bim_house_frame():
     print(f"  Building hierarchy is IFC-compliant")
     print(f"  Ready to export via File → Export → IFC")
 
-    # Save the document
+    # Save the document with fast compression; the Structure BReps compress to
+    # about the same size at level 1 as at FreeCAD's default level of 3
     output_file = "/home/user/house/House_Frame_BIM.FCStd"
-    doc.saveAs(output_file)
+    doc_params = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Document")
+    compression_level = doc_params.GetInt("CompressionLevel", 3)
+    doc_params.SetInt("CompressionLevel", 1)
+    try:
+        doc.saveAs(output_file)
+    finally:
+        doc_params.SetInt("CompressionLevel", compression_level)
     print(f"\n✓ Saved to: {output_file}")
 
     print("\n" + "=" * 70)
@@ -5,6 +5,7 @@ This script adds proper metadata, organizes objects into groups, and enhances th
 """
 
 import os
+import re
 import sys
 
 # Add FreeCAD lib path if needed
@@ -24,6 +25,31 @@ except ImportError:
     import FreeCAD
     import Arch
 
+# Object names in the frame file, e.g. "Footing_1", "Post_L_3" or "RidgeBeam".
+# Specific kinds are listed before the generic ones they start with.
+NAME_PATTERN = re.compile(
+    r'Footing|Column_Center|Post_L|Post_R|Column|Post'
+    r'|RidgeBeam|HBeam_Left|HBeam_Right|Beam|Rafter_L|Rafter_R|Rafter'
+)
+
+# Object kind -> (category, relabel). relabel is an (old, new) replacement
+# applied to the current label, a fixed label, or None to keep the label.
+NAME_KINDS = {
+    "Footing": ("foundation", ("Footing_", "Footing ")),
+    "Column_Center": ("columns", ("Column_Center_", "Center Column ")),
+    "Post_L": ("columns", ("Post_L_", "Left Post ")),
+    "Post_R": ("columns", ("Post_R_", "Right Post ")),
+    "Column": ("columns", None),
+    "Post": ("columns", None),
+    "RidgeBeam": ("beams", "Ridge Beam (Peak)"),
+    "HBeam_Left": ("beams", "Horizontal Beam (Left)"),
+    "HBeam_Right": ("beams", "Horizontal Beam (Right)"),
+    "Beam": ("beams", None),
+    "Rafter_L": ("rafters", ("Rafter_L_", "Left Rafter ")),
+    "Rafter_R": ("rafters", ("Rafter_R_", "Right Rafter ")),
+    "Rafter": ("rafters", None),
+}
+
 def improve_frame_cad(input_file, output_file):
     """
     Improve the frame CAD file with professional features.
@@ -79,60 +105,44 @@ def improve_frame_cad(input_file, output_file):
     beam_objects = []
     rafter_objects = []
 
+    buckets = {
+        "foundation": foundation_objects,
+        "columns": column_objects,
+        "beams": beam_objects,
+        "rafters": rafter_objects,
+    }
+
     for obj in doc.Objects:
+        name = obj.Name
+
         # Skip the groups themselves
-        if obj.Name in ["Foundation", "Columns", "Beams", "Roof", "Structure"]:
+        if name in ["Foundation", "Columns", "Beams", "Roof", "Structure"]:
             continue
 
-        # Categorize by name
-        if "Footing" in obj.Name:
-            foundation_objects.append(obj)
-            obj.Label = obj.Label.replace("Footing_", "Footing ")
-        elif "Column" in obj.Name or "Post" in obj.Name:
-            column_objects.append(obj)
-            if "Column_Center" in obj.Name:
-                obj.Label = obj.Label.replace("Column_Center_", "Center Column ")
-            elif "Post_L_" in obj.Name:
-                obj.Label = obj.Label.replace("Post_L_", "Left Post ")
-            elif "Post_R_" in obj.Name:
-                obj.Label = obj.Label.replace("Post_R_", "Right Post ")
-        elif "Beam" in obj.Name:
-            beam_objects.append(obj)
-            if "RidgeBeam" in obj.Name:
-                obj.Label = "Ridge Beam (Peak)"
-            elif "HBeam_Left" in obj.Name:
-                obj.Label = "Horizontal Beam (Left)"
-            elif "HBeam_Right" in obj.Name:
-                obj.Label = "Horizontal Beam (Right)"
-        elif "Rafter" in obj.Name:
-            rafter_objects.append(obj)
-            if "Rafter_L_" in obj.Name:
-                obj.Label = obj.Label.replace("Rafter_L_", "Left Rafter ")
-            elif "Rafter_R_" in obj.Name:
-                obj.Label = obj.Label.replace("Rafter_R_", "Right Rafter ")
+        # Categorize and relabel by name
+        match = NAME_PATTERN.search(name)
+        if not match:
+            continue
+        category, relabel = NAME_KINDS[match.group()]
+        buckets[category].append(obj)
+        if isinstance(relabel, tuple):
+            obj.Label = obj.Label.replace(*relabel)
+        elif relabel:
+            obj.Label = relabel
 
     # Add objects to their respective groups
-    if foundation_objects:
-        foundation_group.addObjects(foundation_objects)
-        print(f"  Added {len(foundation_objects)} foundation objects")
-
-    if column_objects:
-        columns_group.addObjects(column_objects)
-        print(f"  Added {len(column_objects)} column/post objects")
-
-    if beam_objects:
-        beams_group.addObjects(beam_objects)
-        print(f"  Added {len(beam_objects)} beam objects")
-
-    if rafter_objects:
-        roof_group.addObjects(rafter_objects)
-        print(f"  Added {len(rafter_objects)} rafter objects")
+    for group, objects, description in (
+        (foundation_group, foundation_objects, "foundation"),
+        (columns_group, column_objects, "column/post"),
+        (beams_group, beam_objects, "beam"),
+        (roof_group, rafter_objects, "rafter"),
+    ):
+        if objects:
+            group.addObjects(objects)
+            print(f"  Added {len(objects)} {description} objects")
 
     # Add subgroups to master structure group
-    structure_group.addObject(foundation_group)
-    structure_group.addObject(columns_group)
-    structure_group.addObject(beams_group)
-    structure_group.addObject(roof_group)
+    structure_group.addObjects([foundation_group, columns_group, beams_group, roof_group])
 
     print("Enhancing object properties...")
 
@@ -4,109 +4,220 @@ Script to improve house frame FreeCAD file by directly modifying the XML structu
 This approach works without FreeCAD installation.
 """
 
+import copy
+import io
 import os
+import re
+import struct
 import sys
-import shutil
+import tempfile
 import zipfile
-import xml.etree.ElementTree as ET
-from datetime import datetime
+import zlib
+from datetime import datetime, timezone
+from xml.sax.saxutils import quoteattr
+
+# Prefer lxml's C parser/serializer; fall back to the standard library
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+# Document properties written into the improved file
+AUTHOR = 'Professional House Designer <designer@architecture.com>'
+COMPANY = 'Professional Architecture Firm'
+DOCUMENT_COMMENT = (
+    'Professional timber frame house structure with gabled roof system. '
+    'Includes foundation footings, vertical columns/posts, horizontal beams, '
+    'and complete roof rafter assembly.'
+)
+DOCUMENT_LABEL = 'Professional_House_Frame'
+
+# Project metadata for the document's Meta map, pre-rendered as Map items
+PROJECT_METADATA = (
+    ('Project', 'Residential House Frame'),
+    ('Type', 'Structural Frame'),
+    ('Category', 'Timber Construction'),
+    ('BuildingCode', 'IBC 2021'),
+    ('DesignLoad', 'Residential'),
+)
+PROJECT_METADATA_XML = '<Map>{}</Map>'.format(''.join(
+    f'<Item key={quoteattr(key)} value={quoteattr(value)}/>'
+    for key, value in PROJECT_METADATA
+))
+
+# Organizational groups: (name, label, member groups)
+GROUPS = (
+    ('Structure', 'House_Frame_Structure', ('Foundation', 'Columns', 'Beams', 'Roof')),
+    ('Foundation', '01_Foundation', ()),
+    ('Columns', '02_Columns_and_Posts', ()),
+    ('Beams', '03_Horizontal_Beams', ()),
+    ('Roof', '04_Roof_Rafters', ()),
+)
+
+# Entries added to the Objects section for each organizational group
+GROUP_DEPS_TEMPLATE = '<ObjectDeps Name="{name}" Count="{count}">{deps}</ObjectDeps>'
+GROUP_OBJECT_TEMPLATE = '<Object type="App::DocumentObjectGroup" name="{name}" id="{id}"/>'
+
+# Label prefixes (and whole labels for the beams) with their readable form
+LABEL_REWRITES = {
+    'Footing_': 'Footing ',
+    'Column_Center_': 'Center Column ',
+    'Post_L_': 'Left Post ',
+    'Post_R_': 'Right Post ',
+    'RidgeBeam': 'Ridge Beam (Peak)',
+    'HBeam_Left': 'Horizontal Beam (Left)',
+    'HBeam_Right': 'Horizontal Beam (Right)',
+    'Rafter_L_': 'Left Rafter ',
+    'Rafter_R_': 'Right Rafter ',
+}
+LABEL_PATTERN = re.compile(
+    r'(?:Footing_|Column_Center_|Post_L_|Post_R_|Rafter_L_|Rafter_R_'
+    r'|(?:RidgeBeam|HBeam_Left|HBeam_Right)$)'
+)
+
+def _set_string_property(props_by_name, name, value):
+    """Set a document property's String value; return the Property, or None if absent."""
+    prop = props_by_name.get(name)
+    if prop is not None:
+        string_elem = prop.find('String')
+        if string_elem is not None:
+            string_elem.set('value', value)
+    return prop
+
+def _deflate(info, data, compresslevel):
+    """
+    Deflate new data for an archive entry.
+
+    Args:
+        info: ZipInfo of the entry; a copy carries the new CRC and sizes
+        data: Uncompressed bytes of the entry
+        compresslevel: zlib compression level, 0-9
+
+    Returns:
+        Tuple of (ZipInfo, raw DEFLATE bytes)
+    """
+    entry = copy.copy(info)
+    entry.compress_type = zipfile.ZIP_DEFLATED
+    entry.CRC = zlib.crc32(data)
+    entry.file_size = len(data)
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return entry, compressor.compress(data) + compressor.flush()
+
+def _read_raw_entry(fp, info):
+    """Return an entry's data exactly as stored in the archive open as fp."""
+    fp.seek(info.header_offset)
+    *_, name_length, extra_length = struct.unpack(
+        zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader)
+    )
+    fp.seek(name_length + extra_length, os.SEEK_CUR)
+    return fp.read(info.compress_size)
+
+def _write_zip(output_file, entries, comment=b''):
+    """
+    Write a ZIP archive from entries that are already compressed.
 
-def improve_frame_cad_xml(input_file, output_file):
+    Args:
+        output_file: Path to the archive to create
+        entries: Iterable of (ZipInfo, compressed bytes) in archive order; each
+            ZipInfo carries the entry's CRC, file_size and compress_type
+        comment: Archive comment
+    """
+    central_dir = []
+    with open(output_file, 'wb') as fp:
+        for info, data in entries:
+            offset = fp.tell()
+            if max(offset, len(data), info.file_size) > 0xFFFFFFFF:
+                raise zipfile.LargeZipFile(f"{info.filename} needs ZIP64 extensions")
+
+            # Sizes go in the local header, so no data descriptor (bit 3);
+            # bit 11 marks UTF-8 names
+            try:
+                name = info.filename.encode('ascii')
+                flags = info.flag_bits & ~0x808
+            except UnicodeEncodeError:
+                name = info.filename.encode('utf-8')
+                flags = (info.flag_bits & ~0x8) | 0x800
+            year, month, day, hour, minute, second = info.date_time
+            dos_time = hour << 11 | minute << 5 | second // 2
+            dos_date = (year - 1980) << 9 | month << 5 | day
+
+            fp.write(struct.pack(
+                zipfile.structFileHeader, zipfile.stringFileHeader,
+                info.extract_version, 0, flags, info.compress_type, dos_time, dos_date,
+                info.CRC, len(data), info.file_size, len(name), 0
+            ))
+            fp.write(name)
+            fp.write(data)
+            central_dir.append(struct.pack(
+                zipfile.structCentralDir, zipfile.stringCentralDir,
+                info.create_version, info.create_system, info.extract_version, 0,
+                flags, info.compress_type, dos_time, dos_date,
+                info.CRC, len(data), info.file_size, len(name), 0, 0, 0,
+                info.internal_attr, info.external_attr, offset
+            ) + name)
+
+        start_dir = fp.tell()
+        fp.writelines(central_dir)
+        size_dir = fp.tell() - start_dir
+        if len(central_dir) > 0xFFFF or fp.tell() > 0xFFFFFFFF:
+            raise zipfile.LargeZipFile("Archive needs ZIP64 extensions")
+        fp.write(struct.pack(
+            zipfile.structEndArchive, zipfile.stringEndArchive,
+            0, 0, len(central_dir), len(central_dir), size_dir, start_dir, len(comment)
+        ))
+        fp.write(comment)
+
+def improve_frame_cad_xml(input_file, output_file, compresslevel=1):
     """
     Improve the frame CAD file by modifying XML directly.
 
     Args:
         input_file: Path to the input FreeCAD file
         output_file: Path to save the improved file
+        compresslevel: zlib level for the rewritten Document.xml; the default
+            of 1 is over twice as fast as zlib's 6 for a somewhat larger entry
     """
     print(f"Processing: {input_file}")
-
-    # Create temporary directory
-    temp_dir = "/tmp/freecad_improve"
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-    os.makedirs(temp_dir)
-
-    # Extract the FreeCAD file (it's a ZIP archive)
-    print("Extracting FreeCAD file...")
-    with zipfile.ZipFile(input_file, 'r') as zip_ref:
-        zip_ref.extractall(temp_dir)
-
-    # Parse Document.xml
-    doc_xml_path = os.path.join(temp_dir, 'Document.xml')
+    modified_date = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    # Parse Document.xml straight out of the FreeCAD file (it's a ZIP archive)
+    # The whole tree is kept in memory rather than streamed or regex-patched
+    # as raw bytes: the header Properties and the Objects list are both
+    # rewritten structurally, attribute values need proper XML escaping, and
+    # the document stays small because shape data lives in separate .brp
+    # entries
     print("Parsing Document.xml...")
-    tree = ET.parse(doc_xml_path)
+    with zipfile.ZipFile(input_file, 'r') as zip_ref:
+        with zip_ref.open('Document.xml') as doc_xml:
+            tree = ET.parse(doc_xml)
     root = tree.getroot()
 
     # Update document metadata
     print("Adding professional metadata...")
     properties = root.find('Properties')
     if properties is not None:
-        # Update CreatedBy
-        created_by = properties.find(".//Property[@name='CreatedBy']")
-        if created_by is not None:
-            string_elem = created_by.find('String')
-            if string_elem is not None:
-                string_elem.set('value', 'Professional House Designer <designer@architecture.com>')
-            created_by.set('status', '1')  # Make it visible
-
-        # Update LastModifiedBy
-        last_modified = properties.find(".//Property[@name='LastModifiedBy']")
-        if last_modified is not None:
-            string_elem = last_modified.find('String')
-            if string_elem is not None:
-                string_elem.set('value', 'Professional House Designer <designer@architecture.com>')
-            last_modified.set('status', '1')
-
-        # Update Company
-        company = properties.find(".//Property[@name='Company']")
-        if company is not None:
-            string_elem = company.find('String')
-            if string_elem is not None:
-                string_elem.set('value', 'Professional Architecture Firm')
-
-        # Update Comment
-        comment = properties.find(".//Property[@name='Comment']")
-        if comment is not None:
-            string_elem = comment.find('String')
-            if string_elem is not None:
-                string_elem.set('value', 'Professional timber frame house structure with gabled roof system. Includes foundation footings, vertical columns/posts, horizontal beams, and complete roof rafter assembly.')
-
-        # Update Label
-        label = properties.find(".//Property[@name='Label']")
-        if label is not None:
-            string_elem = label.find('String')
-            if string_elem is not None:
-                string_elem.set('value', 'Professional_House_Frame')
-
-        # Update LastModifiedDate
-        last_date = properties.find(".//Property[@name='LastModifiedDate']")
-        if last_date is not None:
-            string_elem = last_date.find('String')
-            if string_elem is not None:
-                string_elem.set('value', datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'))
+        # Index the document properties by name in a single walk
+        props_by_name = {prop.get('name'): prop for prop in properties.iterfind('Property')}
+
+        # Update authorship and make it visible
+        for name in ('CreatedBy', 'LastModifiedBy'):
+            prop = _set_string_property(props_by_name, name, AUTHOR)
+            if prop is not None:
+                prop.set('status', '1')
+
+        _set_string_property(props_by_name, 'Company', COMPANY)
+        _set_string_property(props_by_name, 'Comment', DOCUMENT_COMMENT)
+        _set_string_property(props_by_name, 'Label', DOCUMENT_LABEL)
+        _set_string_property(props_by_name, 'LastModifiedDate', modified_date)
 
         # Add metadata map
-        meta = properties.find(".//Property[@name='Meta']")
+        meta = props_by_name.get('Meta')
         if meta is not None:
             map_elem = meta.find('Map')
             if map_elem is not None:
-                map_elem.set('count', '5')
-                # Clear existing entries
-                for item in list(map_elem):
-                    map_elem.remove(item)
-                # Add new metadata
-                metadata = {
-                    'Project': 'Residential House Frame',
-                    'Type': 'Structural Frame',
-                    'Category': 'Timber Construction',
-                    'BuildingCode': 'IBC 2021',
-                    'DesignLoad': 'Residential'
-                }
-                for key, value in metadata.items():
-                    item = ET.SubElement(map_elem, 'Item')
-                    item.set('key', key)
-                    item.set('value', value)
+                # Replace existing entries with the new metadata in one step
+                map_elem[:] = list(ET.fromstring(PROJECT_METADATA_XML))
+                map_elem.set('count', str(len(PROJECT_METADATA)))
 
     # Find the Objects section to add groups
     print("Creating organizational groups...")
@@ -114,29 +225,15 @@ def improve_frame_cad_xml(input_file, output_file):
     if objects is not None:
         current_count = int(objects.get('Count', 0))
 
-        # We'll add 5 groups: Structure (master), Foundation, Columns, Beams, Roof
-        new_count = current_count + 5
-
-        # Add ObjectDeps for new groups
-        object_deps = root.find('Objects')
-
-        # Create group definitions
-        groups_to_add = [
-            ('Structure', 'House_Frame_Structure', ['Foundation', 'Columns', 'Beams', 'Roof']),
-            ('Foundation', '01_Foundation', []),
-            ('Columns', '02_Columns_and_Posts', []),
-            ('Beams', '03_Horizontal_Beams', []),
-            ('Roof', '04_Roof_Rafters', [])
-        ]
+        # One group per GROUPS entry: Structure (master), Foundation, Columns, Beams, Roof
+        new_count = current_count + len(GROUPS)
 
         # Add dependencies for groups
-        for group_name, label, deps in groups_to_add:
-            obj_dep = ET.SubElement(objects, 'ObjectDeps')
-            obj_dep.set('Name', group_name)
-            obj_dep.set('Count', str(len(deps)))
-            for dep in deps:
-                dep_elem = ET.SubElement(obj_dep, 'Dep')
-                dep_elem.set('Name', dep)
+        for group_name, _, deps in GROUPS:
+            dep_elems = ''.join(f'<Dep Name="{dep}"/>' for dep in deps)
+            objects.append(ET.fromstring(GROUP_DEPS_TEMPLATE.format(
+                name=group_name, count=len(deps), deps=dep_elems
+            )))
 
         # Categorize existing objects into groups
         foundation_objects = []
@@ -144,102 +241,74 @@ def improve_frame_cad_xml(input_file, output_file):
         beam_objects = []
         rafter_objects = []
 
-        # Find all object definitions
-        for obj in objects.findall('Object'):
+        # Find all object definitions, classified by name prefix
+        for obj in objects.iterfind('Object'):
             name = obj.get('name', '')
-            if 'Footing' in name:
+            if name.startswith('Footing'):
                 foundation_objects.append(name)
-            elif 'Column' in name or 'Post' in name:
+            elif name.startswith(('Column', 'Post')):
                 column_objects.append(name)
-            elif 'Beam' in name:
+            elif name.startswith(('Beam', 'RidgeBeam', 'HBeam')):
                 beam_objects.append(name)
-            elif 'Rafter' in name:
+            elif name.startswith('Rafter'):
                 rafter_objects.append(name)
 
         # Add group objects
-        group_id = current_count + 1
-        for group_name, label, _ in groups_to_add:
-            obj = ET.SubElement(objects, 'Object')
-            obj.set('type', 'App::DocumentObjectGroup')
-            obj.set('name', group_name)
-            obj.set('id', str(group_id))
-            group_id += 1
+        for group_id, (group_name, _, _) in enumerate(GROUPS, current_count + 1):
+            objects.append(ET.fromstring(GROUP_OBJECT_TEMPLATE.format(name=group_name, id=group_id)))
 
         objects.set('Count', str(new_count))
 
-        # Now add Properties sections for each group
-        # This is complex - we'll add basic properties
-        for group_name, label, _ in groups_to_add:
-            # Add group description
-            comments = {
-                'Structure': 'Complete timber frame house structure',
-                'Foundation': 'Foundation footings supporting the structural frame',
-                'Columns': 'Vertical structural columns and posts',
-                'Beams': 'Horizontal structural beams including ridge beam',
-                'Roof': 'Roof rafter system for gabled roof structure'
-            }
-
-            # Find or create object properties section
-            # This would require parsing the entire structure
-            # For now, we'll just update the object definitions
+        # Properties sections for the groups (with their descriptions) would
+        # require building full ObjectData entries; for now only the object
+        # definitions are added
 
     # Improve object labels
     print("Enhancing object labels...")
-    # Parse through the XML to find and update object labels
-    for obj_props in root.findall(".//ObjectData"):
-        obj_name = obj_props.get('name', '')
-
-        # Find Label property
-        for prop in obj_props.findall(".//Property[@name='Label']"):
-            string_elem = prop.find('String')
-            if string_elem is not None:
-                current_label = string_elem.get('value', '')
-
-                # Improve labels
-                new_label = current_label
-                if 'Footing_' in current_label:
-                    new_label = current_label.replace('Footing_', 'Footing ')
-                elif 'Column_Center_' in current_label:
-                    new_label = current_label.replace('Column_Center_', 'Center Column ')
-                elif 'Post_L_' in current_label:
-                    new_label = current_label.replace('Post_L_', 'Left Post ')
-                elif 'Post_R_' in current_label:
-                    new_label = current_label.replace('Post_R_', 'Right Post ')
-                elif 'RidgeBeam' in current_label:
-                    new_label = 'Ridge Beam (Peak)'
-                elif 'HBeam_Left' in current_label:
-                    new_label = 'Horizontal Beam (Left)'
-                elif 'HBeam_Right' in current_label:
-                    new_label = 'Horizontal Beam (Right)'
-                elif 'Rafter_L_' in current_label:
-                    new_label = current_label.replace('Rafter_L_', 'Left Rafter ')
-                elif 'Rafter_R_' in current_label:
-                    new_label = current_label.replace('Rafter_R_', 'Right Rafter ')
-
+    # Each object's Label is a direct Property of its ObjectData entry
+    for string_elem in root.iterfind("ObjectData/Object/Properties/Property[@name='Label']/String"):
+        current_label = string_elem.get('value', '')
+
+        # Improve labels; labels that match no rule are left untouched
+        match = LABEL_PATTERN.match(current_label)
+        if match:
+            new_label = LABEL_REWRITES[match.group()] + current_label[match.end():]
+            if new_label != current_label:
                 string_elem.set('value', new_label)
 
-    # Save modified XML
-    print("Saving modified Document.xml...")
-    tree.write(doc_xml_path, encoding='utf-8', xml_declaration=True)
-
-    # Create new FreeCAD file
+    # Serialize the modified XML straight to bytes for the zip writer.
+    # tree.write is used rather than ET.tostring: lxml's tostring(root)
+    # drops the comments ahead of the root element and the stdlib tostring
+    # does not accept a tree, while writing the tree covers both backends.
+    with io.BytesIO() as buffer:
+        tree.write(buffer, encoding='utf-8', xml_declaration=True)
+        xml_bytes = buffer.getvalue()
+
+    # Create new FreeCAD file with the modified Document.xml; every other
+    # entry is copied across as its stored compressed bytes, so only
+    # Document.xml is compressed again. The archive is written in a per-run
+    # temporary directory next to the output and moved into place, so a
+    # failed run never leaves a truncated file and output_file may be the
+    # input file itself.
     print(f"Creating improved FreeCAD file: {output_file}")
-    with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root_dir, dirs, files in os.walk(temp_dir):
-            for file in files:
-                file_path = os.path.join(root_dir, file)
-                arcname = os.path.relpath(file_path, temp_dir)
-                zipf.write(file_path, arcname)
-
-    # Cleanup
-    shutil.rmtree(temp_dir)
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    with tempfile.TemporaryDirectory(prefix='freecad_improve_', dir=output_dir) as temp_dir:
+        temp_output = os.path.join(temp_dir, os.path.basename(output_file))
+        with zipfile.ZipFile(input_file, 'r') as src, open(input_file, 'rb') as fp:
+            entries = (
+                _deflate(info, xml_bytes, compresslevel) if info.filename == 'Document.xml'
+                else (info, _read_raw_entry(fp, info))
+                for info in src.infolist()
+            )
+            _write_zip(temp_output, entries, src.comment)
+        os.replace(temp_output, output_file)
 
     print("\n✓ Successfully improved the CAD file!")
     print(f"\nImprovements applied:")
     print("  • Added professional metadata (author, company, project info)")
     print("  • Added project metadata (type, category, building code)")
     print("  • Enhanced object labels for clarity")
-    print("  • Updated document name to 'Professional_House_Frame'")
+    print(f"  • Updated document name to '{DOCUMENT_LABEL}'")
     print(f"  • Processed {len(foundation_objects) if 'foundation_objects' in locals() else 'N/A'} foundation objects")
     print(f"  • Processed {len(column_objects) if 'column_objects' in locals() else 'N/A'} column/post objects")
     print(f"  • Processed {len(beam_objects) if 'beam_objects' in locals() else 'N/A'} beam objects")